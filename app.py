@@ -30,6 +30,65 @@ EXPECTED_COLUMNS = [
     'DMS_APPVL_PROC_STATUS_AUTO_BAG_MIRROR', 'FINAL_INCOTERM', 'STOCK_COMMENTS'
 ]
 
+# Production column aliases for the downloaded report: original_name -> production_alias
+PRODUCTION_COLUMN_ALIASES = {
+    'name': 'BAG ID',
+    'BAG_LOT_NO_BAG_MIRROR': 'KICO LOT NO',
+    'MEGA_BAG_LOT_NO_BAG': 'MEGA TERMINAL LOT NO',
+    'BAG_LOT_NO_BAG_MIRROR_FNL': 'ACTIVE LOT NO',
+    'KICO_MINE_LOADING_MONTH_BAG': 'LOADING MONTH - KICO',
+    'EXPORT_MINE_LOADING_MONTH_BAG': 'LOADING MONTH - EXPORT',
+    'BAG_EXPORT_MONTH': 'DRC EXPORT MONTH',
+    'BAG_PRN_MONTH': 'PORT RECEIVED MONTH',
+    'TRUCK_TYPE_BAG_MIRROR': 'SHUNT / EXPORT',
+    'SUB_BUYER_BAG_MIRROR': 'OFFTAKER',
+    'TRUCK_LOADING_POINT_BAG_MIRROR': 'LOADING POINT',
+    'LSP_NAME_BAG_MIRROR': 'LSP NAME',
+    'ROUTE_TYPE_BAG_MIRROR': 'ROUTE TYPE',
+    'BAG_FLAG_STATUS_UPL': 'BAG FLAG STATUS',
+    'LIVE_CURRENT_ACTIVITY': 'CURRENT ACTIVITY',
+    'LIVE_CURRENT_ACTIVITY_1': 'ACTIVITY CRITERIA 1',
+    'LIVE_CURRENT_ACTIVITY_2': 'ACTIVITY CRITERIA 2',
+    'ROUTE_BAG_ETA_CALC': 'ETA TO PORT',
+    'EST_PRN_RECEIVED_DATE': 'ESTIMATED PORT WAREHOUSE RECEIVE DATE',
+    'EST_PRN_RECEIVE_DATE_GROUPED': 'ESTIMATED PORT WAREHOUSE RECEIVE DATE (GROUPED)',
+    'OFFLOADING_TRUCK_ID': 'OFFLOADING / CURRENT REG ID',
+    'BAG_GROSS_WET_KG_INCL_SAMPLE_WMT': 'DRC DATA - GROSS WT INCL. SAMPLE (TONS)',
+    'BAG_GROSS_EXCL_SAMPLE_WMT': 'DRC DATA - GROSS WEIGHT EXCL. SAMPLE (TONS)',
+    'BAG_NET_EXCL_SAMPLE_WMT': 'DRC DATA - NET WEIGHT EXCL. SAMPLE (TONS)',
+    'BAG_GROSS_WET_KG_INCL_SAMPLE_KG': 'DRC DATA - GROSS WT INCL. SAMPLE (KG)',
+    'BAG_GROSS_EXCL_SAMPLE_KG': 'DRC DATA - GROSS WT EXCL. SAMPLE (KG)',
+    'DRC DATA - NET WT EXCL. SAMPLE (KG)': 'DRC DATA - NET WT EXCL. SAMPLE (KG)',
+    'MINE_LOADING_TS_BAG_MIRROR': 'DRC LOADED DATE',
+    'MINE_EXIT_TS_BAG_MIRROR': 'MINE EXIT DATE',
+    'BAG_EXPORT_TS': 'DRC EXPORT DATE',
+    'ROUTE_CONSIGNEE_1_BAG_MIRROR': 'TRANSIT WAREHOUSE',
+    'GRN_WH_GROSS_WEIGHT': 'ZM RECEIVING GW (KG)',
+    'GRN_WH_NET_WEIGHT': 'ZM RECEIVING NET (KG)',
+    'GRN_RECEIVED_DATE': 'ZM WHS RECEIVED DATE',
+    'GDN_LOADED_DATE': 'ZM WHS LOADED DATE',
+    'GDN_DISPATCH_DATE': 'ZM WHS DISPATCH DATE',
+    'PRN_ARRIVAL_DATE': 'PORT WHS ARRIVAL DATE',
+    'ROUTE_PORT_WAREHOUSE_BAG_MIRROR': 'INSTRUCTED PORT WHS',
+    'PRN_WAREHOUSE_NAME_SCOPE_2': 'RECEIVED - PORT WAREHOUSE',
+    'ROUTE_PORT_DESTINATION_BAG_MIRROR': 'INSTRUCTED PORT DESTINATION',
+    'ROUTE_FINAL_DESTINATION_BAG_MIRROR': 'INSTRUCTED FINAL DESTINATION',
+    'PRN_WH_GROSS_WEIGHT_SCOPE_2': 'PORT WHS GW (KG)',
+    'PRN_WH_NET_WEIGHT': 'PORT WHS NET WT (KG)',
+    'PRN_RECEIVED_DATE_SCOPE_2': 'PORT WHS RECEIVED DATE',
+    'PDN_LOADED_DATE': 'PORT WHS LOADED DATE',
+    'PDN_DISPATCH_DATE': 'PORT WHS DISPATCH DATE',
+    'EXPORT_TRUCK_ID_BAG_MIRROR': 'EXPORT TRUCK ID',
+    'SHUNT_TRUCK_ID_BAG_MIRROR': 'SHUNT TRUCK ID',
+    'DRC_WAGON_ID_BAG_MIRROR': 'WAGON ID',
+    'WG_TRAIN_NO_BAG_MIRROR': 'TRAIN NO',
+    'ZAM_TRUCK_ID_BAG_MIRROR': 'ZAMBIA TRUCK ID',
+    'BAG_SEAL_NO': 'DRC DATA - BAG SEAL NO',
+    'DMS_APPVL_PROC_STATUS_AUTO_BAG_MIRROR': 'IVANHOE INVOICE STATUS',
+    'FINAL_INCOTERM': 'FINAL INCOTERM',
+    'STOCK_COMMENTS': 'DIARY OF EVENTS YYYY-MM-DD - (User Initial)'
+}
+
 # Helper functions
 def safe_str(value):
     """Safely convert value to string, handling None/NaN"""
@@ -47,8 +106,21 @@ def is_null(value):
     """Check if value is null/NaN"""
     return pd.isna(value) or value is None
 
+# Default transit days to port per ETA rule (used by ROUTE_BAG_ETA_CALC / EST_PRN_RECEIVED_DATE)
+DEFAULT_ETA_DAYS = {
+    'Loaded (Export) - INDIRECT': 51.0,
+    'Loaded (Export) - DIRECT': 38.0,
+    'Loaded (Shunt Truck) - INDIRECT': 51.0,
+    'Loaded (Shunt Truck) - DIRECT': 38.0,
+    '1st Leg': 39.0,
+    'Direct': 26.0,
+    '2nd Leg': 15.0,
+    'In Stock - Zambia': 29.0,
+    'Arrived Not Offloaded': 2.0
+}
+
 # Calculation functions
-def calculate_route_bag_eta_calc(row):
+def calculate_route_bag_eta_calc(row, eta_days=DEFAULT_ETA_DAYS):
     """Calculate ROUTE_BAG_ETA_CALC (float days)"""
     # If already received at port, ETA is 0
     if is_not_null(row['PRN_RECEIVED_DATE_SCOPE_2']):
@@ -56,23 +128,23 @@ def calculate_route_bag_eta_calc(row):
     
     # Calculate ETA based on current activity and route type
     if row['LIVE_CURRENT_ACTIVITY'] == 'Loaded (Export)' and row['ROUTE_TYPE_BAG_MIRROR'] == 'INDIRECT':
-        return 51.0
+        return eta_days['Loaded (Export) - INDIRECT']
     elif row['LIVE_CURRENT_ACTIVITY'] == 'Loaded (Export)' and row['ROUTE_TYPE_BAG_MIRROR'] == 'DIRECT':
-        return 38.0
+        return eta_days['Loaded (Export) - DIRECT']
     elif row['LIVE_CURRENT_ACTIVITY'] == 'Loaded (Shunt Truck)' and row['ROUTE_TYPE_BAG_MIRROR'] == 'INDIRECT':
-        return 51.0
+        return eta_days['Loaded (Shunt Truck) - INDIRECT']
     elif row['LIVE_CURRENT_ACTIVITY'] == 'Loaded (Shunt Truck)' and row['ROUTE_TYPE_BAG_MIRROR'] == 'DIRECT':
-        return 38.0
+        return eta_days['Loaded (Shunt Truck) - DIRECT']
     elif row['LIVE_CURRENT_ACTIVITY'] == 'In Stock - (Mega Terminal)':
         return 0.0
     elif row['LIVE_CURRENT_ACTIVITY_1'] == '1st Leg':
-        return 39.0
+        return eta_days['1st Leg']
     elif row['LIVE_CURRENT_ACTIVITY_1'] == 'Direct':
-        return 26.0
+        return eta_days['Direct']
     elif row['LIVE_CURRENT_ACTIVITY_1'] == '2nd Leg':
-        return 15.0
+        return eta_days['2nd Leg']
     elif is_not_null(row['PRN_ARRIVAL_DATE']) and is_null(row['PRN_RECEIVED_DATE_SCOPE_2']):
-        return 2.0
+        return eta_days['Arrived Not Offloaded']
     else:
         return 0.0
 
@@ -124,14 +196,14 @@ def safe_date_add_days(date_value, days):
     
     return None
 
-def calculate_est_prn_received_date(row):
+def calculate_est_prn_received_date(row, eta_days=DEFAULT_ETA_DAYS):
     """Calculate EST_PRN_RECEIVED_DATE (datetime)"""
     # If already received at port, return None/0
     if is_not_null(row['PRN_RECEIVED_DATE_SCOPE_2']):
         return None
     
     # Get the ETA days and base date for calculation
-    eta_days = row['ROUTE_BAG_ETA_CALC']
+    days = row['ROUTE_BAG_ETA_CALC']
     base_date = None
     
     if row['LIVE_CURRENT_ACTIVITY'] == 'Loaded (Export)' and row['ROUTE_TYPE_BAG_MIRROR'] == 'INDIRECT':
@@ -150,13 +222,34 @@ def calculate_est_prn_received_date(row):
         base_date = row['BAG_EXPORT_TS']
     elif row['LIVE_CURRENT_ACTIVITY'] == 'In Stock - Zambia':
         base_date = row['GRN_RECEIVED_DATE']
-        eta_days = 29.0  # Special case for Zambia
+        days = eta_days['In Stock - Zambia']  # Special case for Zambia
     elif row['LIVE_CURRENT_ACTIVITY_1'] == '2nd Leg':
         base_date = row['GDN_DISPATCH_DATE']
     elif is_not_null(row['PRN_ARRIVAL_DATE']) and is_null(row['PRN_RECEIVED_DATE_SCOPE_2']):
         base_date = row['PRN_ARRIVAL_DATE']
     
-    return safe_date_add_days(base_date, eta_days)
+    return safe_date_add_days(base_date, days)
+
+def est_date_group_label(est_date):
+    """Get the half-month bucket label for an estimated date (None if the month length is not handled)"""
+    # Get month name and year
+    month_name = est_date.strftime('%B')  # Full month name
+    year = est_date.year
+    
+    # Get days in month
+    days_in_month = calendar.monthrange(year, est_date.month)[1]
+    
+    # Group by date ranges
+    if est_date.day <= 15:
+        return f"1 - 15 {month_name} {year}"
+    elif days_in_month == 28:
+        return f"16 - 28 {month_name} {year}"
+    elif days_in_month == 30:
+        return f"16 - 30 {month_name} {year}"
+    elif days_in_month == 31:
+        return f"16 - 31 {month_name} {year}"
+    else:
+        return None
 
 def calculate_est_prn_receive_date_grouped(row):
     """Calculate EST_PRN_RECEIVE_DATE_GROUPED (string)"""
@@ -195,24 +288,8 @@ def calculate_est_prn_receive_date_grouped(row):
         if current_time > est_date:
             return "Investigate"
         
-        # Get month name and year
-        month_name = est_date.strftime('%B')  # Full month name
-        year = est_date.year
-        
-        # Get days in month
-        days_in_month = calendar.monthrange(year, est_date.month)[1]
-        
-        # Group by date ranges
-        if est_date.day <= 15:
-            return f"1 - 15 {month_name} {year}"
-        elif days_in_month == 28:
-            return f"16 - 28 {month_name} {year}"
-        elif days_in_month == 30:
-            return f"16 - 30 {month_name} {year}"
-        elif days_in_month == 31:
-            return f"16 - 31 {month_name} {year}"
-        else:
-            return row['LIVE_CURRENT_ACTIVITY']
+        group_label = est_date_group_label(est_date)
+        return group_label if group_label is not None else row['LIVE_CURRENT_ACTIVITY']
     
     except Exception as e:
         print(f"DEBUG: Date grouping failed for {est_date}: {e}")
@@ -410,6 +487,262 @@ def process_data(df):
     
     return df_processed
 
+# What-if ETA scenario functions
+def to_naive_dates(series):
+    """Vectorized base date parsing matching safe_date_add_days (timezone-naive datetime64 array)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert(None)
+        return series.to_numpy(dtype='datetime64[ns]')
+
+    # String dates: keep just the date part, "2025-08-29 11:11:19.788000+02:00" -> "2025-08-29"
+    date_part = series.astype(str).str[:10]
+    return pd.to_datetime(date_part, format='%Y-%m-%d', errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+def scenario_eta_days(eta_days, rule):
+    """Get a scenario's transit days for an ETA rule, falling back to DEFAULT_ETA_DAYS for missing or blank cells"""
+    days = eta_days.get(rule)
+    return DEFAULT_ETA_DAYS[rule] if is_null(days) else float(days)
+
+def calculate_eta_scenarios(processed_df, scenarios):
+    """Calculate EST_PRN_RECEIVED_DATE and EST_PRN_RECEIVE_DATE_GROUPED for N ETA tables in one batched pass
+
+    scenarios maps scenario name -> ETA table (DEFAULT_ETA_DAYS keys, missing or blank values fall back to the defaults,
+    negative days raise ValueError).
+    Activity columns are read from processed_df so they are only calculated once; returns two rows x N dataframes.
+    """
+    activity = processed_df['LIVE_CURRENT_ACTIVITY_CORRECTED'].to_numpy()
+    activity_1 = processed_df['LIVE_CURRENT_ACTIVITY_1_CORRECTED'].to_numpy()
+    route_type = processed_df['ROUTE_TYPE_BAG_MIRROR'].to_numpy()
+    received = processed_df['PRN_RECEIVED_DATE_SCOPE_2'].notna().to_numpy()
+    arrived = processed_df['PRN_ARRIVAL_DATE'].notna().to_numpy() & ~received
+
+    loaded_export = activity == 'Loaded (Export)'
+    loaded_shunt = activity == 'Loaded (Shunt Truck)'
+    indirect = route_type == 'INDIRECT'
+    direct = route_type == 'DIRECT'
+    mega_terminal = activity == 'In Stock - (Mega Terminal)'
+    first_leg = activity_1 == '1st Leg'
+    direct_leg = activity_1 == 'Direct'
+    second_leg = activity_1 == '2nd Leg'
+    zambia = activity == 'In Stock - Zambia'
+
+    # ETA table as rules x N, with a trailing row of zeros for rows without an ETA rule
+    rules = list(DEFAULT_ETA_DAYS)
+    no_eta = len(rules)
+    eta_table = np.array([[scenario_eta_days(scenarios[name], rule) for name in scenarios] for rule in rules] +
+                         [[0.0] * len(scenarios)])
+    negative = eta_table < 0
+    if negative.any():
+        rule_idx, scenario_idx = np.argwhere(negative)[0]
+        raise ValueError(f"Negative transit days for '{rules[rule_idx]}' in scenario '{list(scenarios)[scenario_idx]}'")
+
+    # ETA rule per row (same order as calculate_route_bag_eta_calc)
+    eta_rule = np.select(
+        [received,
+         loaded_export & indirect, loaded_export & direct, loaded_shunt & indirect, loaded_shunt & direct,
+         mega_terminal, first_leg, direct_leg, second_leg, arrived],
+        [no_eta,
+         rules.index('Loaded (Export) - INDIRECT'), rules.index('Loaded (Export) - DIRECT'),
+         rules.index('Loaded (Shunt Truck) - INDIRECT'), rules.index('Loaded (Shunt Truck) - DIRECT'),
+         no_eta, rules.index('1st Leg'), rules.index('Direct'), rules.index('2nd Leg'), rules.index('Arrived Not Offloaded')],
+        default=no_eta
+    )
+
+    # Base date per row (same order as calculate_est_prn_received_date)
+    no_date = np.full(len(processed_df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    export_loading_ts = to_naive_dates(processed_df['MINE_LOADING_TS_EXPORT_BAG_MIRROR'])
+    loading_ts = to_naive_dates(processed_df['MINE_LOADING_TS_BAG_MIRROR'])
+    export_ts = to_naive_dates(processed_df['BAG_EXPORT_TS'])
+    base_date_conditions = [
+        received, loaded_export & (indirect | direct), loaded_shunt & (indirect | direct), mega_terminal,
+        first_leg | direct_leg, zambia, second_leg, arrived
+    ]
+    base_date_choices = [
+        no_date, export_loading_ts, loading_ts, no_date,
+        export_ts, to_naive_dates(processed_df['GRN_RECEIVED_DATE']),
+        to_naive_dates(processed_df['GDN_DISPATCH_DATE']), to_naive_dates(processed_df['PRN_ARRIVAL_DATE'])
+    ]
+    base_date = np.select(base_date_conditions, base_date_choices, default=no_date)
+    zambia_base = zambia & ~np.logical_or.reduce(base_date_conditions[:5])
+
+    # rows x N transit days; Zambia stock uses its own ETA instead of ROUTE_BAG_ETA_CALC
+    days = np.where(zambia_base[:, None], eta_table[rules.index('In Stock - Zambia')][None, :], eta_table[eta_rule])
+    seconds = np.round(days * 86400).astype('int64')
+    est_dates = base_date[:, None] + seconds * np.timedelta64(1, 's')
+    est_dates[days == 0] = np.datetime64('NaT')  # safe_date_add_days returns None for 0 days
+
+    # Half-month bucket labels, formatted once per distinct bucket rather than per row
+    has_date = ~np.isnat(est_dates)
+    months = est_dates.astype('datetime64[M]')
+    second_half = (est_dates - months).astype('timedelta64[D]').astype('int64') >= 15
+    bucket_key = np.where(has_date, months.astype('int64') * 2 + second_half, -1)
+    unique_keys, bucket_index = np.unique(bucket_key, return_inverse=True)
+    bucket_labels = np.array([
+        None if key < 0 else est_date_group_label(
+            pd.Timestamp(np.datetime64(int(key // 2), 'M')) + pd.Timedelta(days=15 * int(key % 2)))
+        for key in unique_keys
+    ], dtype=object)
+    bucket = bucket_labels[bucket_index.reshape(est_dates.shape)]
+
+    # Grouping (same order as calculate_est_prn_receive_date_grouped)
+    activity_matrix = np.broadcast_to(activity[:, None], est_dates.shape)
+    red_flag = (processed_df['BAG_FLAG_STATUS_UPL'] != "Normal Cargo").to_numpy()
+    grouped = np.select(
+        [received[:, None] | mega_terminal[:, None],
+         np.broadcast_to(red_flag[:, None], est_dates.shape),
+         ~has_date,
+         est_dates < np.datetime64(datetime.now()),
+         pd.isna(bucket)],
+        [activity_matrix, "Red Flag", activity_matrix, "Investigate", activity_matrix],
+        default=bucket
+    )
+
+    scenario_names = list(scenarios)
+    est_dates_df = pd.DataFrame(est_dates, index=processed_df.index, columns=scenario_names)
+    grouped_df = pd.DataFrame(grouped, index=processed_df.index, columns=scenario_names)
+    return est_dates_df, grouped_df
+
+def create_scenario_comparison(processed_df, grouped_df, weight_col='BAG_NET_EXCL_SAMPLE_WMT'):
+    """Create side-by-side tonnage per EST_PRN_RECEIVE_DATE_GROUPED bucket for each scenario"""
+    weights = pd.to_numeric(processed_df[weight_col], errors='coerce').fillna(0)
+
+    comparison = pd.concat(
+        {name: weights.groupby(grouped_df[name].to_numpy()).sum() for name in grouped_df.columns}, axis=1
+    ).fillna(0)
+
+    # Date buckets in chronological order, followed by activity / status buckets
+    bucket_end = pd.to_datetime(comparison.index.astype(str).str.split(' - ').str[-1], format='%d %B %Y', errors='coerce')
+    order = pd.DataFrame({'end': bucket_end, 'bucket': comparison.index}).sort_values(['end', 'bucket'], na_position='last')
+    comparison = comparison.loc[order['bucket']]
+    comparison.index.name = 'EST_PRN_RECEIVE_DATE_GROUPED'
+    return comparison
+
+def resize_eta_scenario_table():
+    """Rebuild the scenario ETA table for the selected scenario count, keeping already edited columns"""
+    baseline = pd.Series(DEFAULT_ETA_DAYS, name='Baseline')  # Always the table the report itself uses
+    table = st.session_state.get('eta_scenario_edited', baseline.to_frame())
+    columns = [f'Scenario {i}' for i in range(1, st.session_state['eta_scenario_count'] + 1)]
+    resized = pd.concat([baseline] + [table[col] if col in table.columns else baseline.rename(col) for col in columns], axis=1)
+    resized.index.name = 'ETA Rule'
+    st.session_state['eta_scenario_table'] = resized
+    # Edits are now part of the table itself, so start the editor from a clean state
+    st.session_state.pop('eta_scenarios', None)
+
+# Tonnage roll-up functions
+TONNAGE_CUBE_DIMENSIONS = ['LIVE_CURRENT_ACTIVITY', 'EST_PRN_RECEIVE_DATE_GROUPED', 'ROUTE_PORT_DESTINATION_BAG_MIRROR', 'SUB_BUYER_BAG_MIRROR']
+TONNAGE_CUBE_MEASURES = ['BAG_COUNT', 'BAG_NET_EXCL_SAMPLE_WMT', 'PRN_WH_NET_WEIGHT']
+
+def build_tonnage_cube(processed_df):
+    """Pre-aggregate bag count and tonnage over all TONNAGE_CUBE_DIMENSIONS in a single groupby pass"""
+    # Use corrected values where the pipeline recalculates the column
+    dimension_sources = {
+        dim: f'{dim}_CORRECTED' if f'{dim}_CORRECTED' in processed_df.columns else dim
+        for dim in TONNAGE_CUBE_DIMENSIONS
+    }
+
+    cube_input = pd.DataFrame({
+        dim: processed_df[source].fillna('').astype(str).astype('category')
+        for dim, source in dimension_sources.items()
+    })
+    cube_input['BAG_NET_EXCL_SAMPLE_WMT'] = pd.to_numeric(processed_df['BAG_NET_EXCL_SAMPLE_WMT'], errors='coerce').fillna(0)
+    cube_input['PRN_WH_NET_WEIGHT'] = pd.to_numeric(processed_df['PRN_WH_NET_WEIGHT'], errors='coerce').fillna(0)
+
+    cube = cube_input.groupby(TONNAGE_CUBE_DIMENSIONS, observed=True, sort=False).agg(
+        BAG_COUNT=('BAG_NET_EXCL_SAMPLE_WMT', 'size'),
+        BAG_NET_EXCL_SAMPLE_WMT=('BAG_NET_EXCL_SAMPLE_WMT', 'sum'),
+        PRN_WH_NET_WEIGHT=('PRN_WH_NET_WEIGHT', 'sum')
+    )
+    return cube.reset_index()
+
+def rollup_tonnage_cube(cube, dimensions, filters=None):
+    """Roll the tonnage cube up to the given dimensions, optionally filtered by {dimension: [values]}"""
+    if filters:
+        mask = np.ones(len(cube), dtype=bool)
+        for dim, values in filters.items():
+            if values:
+                mask &= cube[dim].isin(values).to_numpy()
+        cube = cube[mask]
+
+    if not dimensions:
+        return cube[TONNAGE_CUBE_MEASURES].agg(['sum']).reset_index(drop=True)
+
+    rollup = cube.groupby(list(dimensions), observed=True)[TONNAGE_CUBE_MEASURES].sum().reset_index()
+    return rollup.sort_values('BAG_NET_EXCL_SAMPLE_WMT', ascending=False, ignore_index=True)
+
+# Snapshot comparison functions
+# Columns kept in an activity snapshot
+SNAPSHOT_COLUMNS = ['name', 'LIVE_CURRENT_ACTIVITY', 'EST_PRN_RECEIVE_DATE_GROUPED', 'BAG_FLAG_STATUS_UPL', 'BAG_NET_EXCL_SAMPLE_WMT']
+
+# Final and at-rest stock activities where an unchanged status is expected, so the bag is not reported as stalled
+STALL_EXEMPT_ACTIVITIES = ['Sailed', 'In Stock - Port', 'In Stock - (Mega Terminal)', 'In Stock - Zambia']
+
+def create_activity_snapshot(df):
+    """Extract the name-keyed activity / ETA bucket snapshot from a processed upload or a downloaded report"""
+    # A stored prior result (downloaded Excel) uses production aliases
+    if 'BAG ID' in df.columns:
+        df = df.rename(columns={alias: col for col, alias in PRODUCTION_COLUMN_ALIASES.items()})
+
+    def latest(col):
+        return df[f'{col}_CORRECTED'] if f'{col}_CORRECTED' in df.columns else df[col]
+
+    snapshot = pd.DataFrame({
+        'name': df['name'],
+        'LIVE_CURRENT_ACTIVITY': latest('LIVE_CURRENT_ACTIVITY').fillna('').astype(str),
+        'EST_PRN_RECEIVE_DATE_GROUPED': latest('EST_PRN_RECEIVE_DATE_GROUPED').fillna('').astype(str),
+        'BAG_FLAG_STATUS_UPL': df['BAG_FLAG_STATUS_UPL'].fillna('').astype(str),
+        'BAG_NET_EXCL_SAMPLE_WMT': pd.to_numeric(df['BAG_NET_EXCL_SAMPLE_WMT'], errors='coerce').fillna(0)
+    })
+    snapshot = snapshot[snapshot['name'].notna()]
+    snapshot['name'] = snapshot['name'].astype(str)
+    return snapshot.drop_duplicates('name', keep='last').reset_index(drop=True)
+
+def compare_snapshots(previous_snapshot, current_snapshot):
+    """Join two activity snapshots on name and report bag movements
+
+    Only the snapshot columns are joined (no full cross-column diff). Returns a dict with the old -> new
+    LIVE_CURRENT_ACTIVITY transitions matrix and the moved, new, departed, stalled and newly "Investigate" bags.
+    Stalled bags keep the same in-transit / loaded activity in both snapshots, i.e. excluding STALL_EXEMPT_ACTIVITIES
+    (stock at rest), blank activities and Insurance Claim bags (whose activity is the free-text flag detail).
+
+    EST_PRN_RECEIVE_DATE_GROUPED is compared as each snapshot reported it: a previous template CSV or production
+    workbook keeps its own column (grouped against that report's date), while the current snapshot uses the
+    recalculated bucket. Recalculating the previous bucket today would hide bags that went overdue since then.
+    """
+    merged = previous_snapshot.merge(
+        current_snapshot, on='name', how='outer', suffixes=('_PREVIOUS', '_CURRENT'), indicator=True
+    )
+    in_both = (merged['_merge'] == 'both').to_numpy()
+    previous_activity = merged['LIVE_CURRENT_ACTIVITY_PREVIOUS']
+    current_activity = merged['LIVE_CURRENT_ACTIVITY_CURRENT']
+    unchanged = in_both & (previous_activity == current_activity).to_numpy()
+    trackable = (~current_activity.isin(STALL_EXEMPT_ACTIVITIES) & (current_activity != '') &
+                 (merged['BAG_FLAG_STATUS_UPL_CURRENT'] != 'Insurance Claim')).to_numpy()
+    newly_investigate = in_both & (
+        (merged['EST_PRN_RECEIVE_DATE_GROUPED_CURRENT'] == 'Investigate') &
+        (merged['EST_PRN_RECEIVE_DATE_GROUPED_PREVIOUS'] != 'Investigate')
+    ).to_numpy()
+
+    matched = merged[in_both]
+    transitions = pd.crosstab(
+        matched['LIVE_CURRENT_ACTIVITY_PREVIOUS'].astype('category'),
+        matched['LIVE_CURRENT_ACTIVITY_CURRENT'].astype('category'),
+        rownames=['Previous Activity'], colnames=['Current Activity']
+    )
+
+    movement_cols = ['name', 'LIVE_CURRENT_ACTIVITY_PREVIOUS', 'LIVE_CURRENT_ACTIVITY_CURRENT', 'BAG_NET_EXCL_SAMPLE_WMT_CURRENT']
+    current_cols = ['name', 'LIVE_CURRENT_ACTIVITY_CURRENT', 'BAG_NET_EXCL_SAMPLE_WMT_CURRENT']
+    return {
+        'transitions': transitions,
+        'moved': merged.loc[in_both & ~unchanged, movement_cols].reset_index(drop=True),
+        'new': merged.loc[(merged['_merge'] == 'right_only').to_numpy(), current_cols].reset_index(drop=True),
+        'departed': merged.loc[(merged['_merge'] == 'left_only').to_numpy(),
+                               ['name', 'LIVE_CURRENT_ACTIVITY_PREVIOUS', 'BAG_NET_EXCL_SAMPLE_WMT_PREVIOUS']].reset_index(drop=True),
+        'stalled': merged.loc[unchanged & trackable, current_cols].reset_index(drop=True),
+        'newly_investigate': merged.loc[newly_investigate,
+                                        ['name', 'EST_PRN_RECEIVE_DATE_GROUPED_PREVIOUS'] + current_cols[1:]].reset_index(drop=True)
+    }
+
 def normalize_datetime_for_comparison(value):
     """Normalize datetime values for accurate comparison"""
     if pd.isna(value) or value is None:
@@ -478,8 +811,8 @@ def create_comparison_df(original_df, processed_df):
     
     return pd.DataFrame(comparison_data)
 
-def create_excel_download(processed_df):
-    """Create Excel file for download with production column aliases"""
+def create_excel_download(processed_df, tonnage_cube=None):
+    """Create Excel file for download with production column aliases (plus a tonnage summary sheet if a cube is given)"""
     final_df = processed_df.copy()
     
     # Update corrected values
@@ -491,65 +824,6 @@ def create_excel_download(processed_df):
     final_df['EST_PRN_RECEIVED_DATE'] = final_df['EST_PRN_RECEIVED_DATE_CORRECTED']
     final_df['EST_PRN_RECEIVE_DATE_GROUPED'] = final_df['EST_PRN_RECEIVE_DATE_GROUPED_CORRECTED']
     
-    # Define column mapping: original_name -> production_alias
-    column_mapping = {
-        'name': 'BAG ID',
-        'BAG_LOT_NO_BAG_MIRROR': 'KICO LOT NO',
-        'MEGA_BAG_LOT_NO_BAG': 'MEGA TERMINAL LOT NO',
-        'BAG_LOT_NO_BAG_MIRROR_FNL': 'ACTIVE LOT NO',
-        'KICO_MINE_LOADING_MONTH_BAG': 'LOADING MONTH - KICO',
-        'EXPORT_MINE_LOADING_MONTH_BAG': 'LOADING MONTH - EXPORT',
-        'BAG_EXPORT_MONTH': 'DRC EXPORT MONTH',
-        'BAG_PRN_MONTH': 'PORT RECEIVED MONTH',
-        'TRUCK_TYPE_BAG_MIRROR': 'SHUNT / EXPORT',
-        'SUB_BUYER_BAG_MIRROR': 'OFFTAKER',
-        'TRUCK_LOADING_POINT_BAG_MIRROR': 'LOADING POINT',
-        'LSP_NAME_BAG_MIRROR': 'LSP NAME',
-        'ROUTE_TYPE_BAG_MIRROR': 'ROUTE TYPE',
-        'BAG_FLAG_STATUS_UPL': 'BAG FLAG STATUS',
-        'LIVE_CURRENT_ACTIVITY': 'CURRENT ACTIVITY',
-        'LIVE_CURRENT_ACTIVITY_1': 'ACTIVITY CRITERIA 1',
-        'LIVE_CURRENT_ACTIVITY_2': 'ACTIVITY CRITERIA 2',
-        'ROUTE_BAG_ETA_CALC': 'ETA TO PORT',
-        'EST_PRN_RECEIVED_DATE': 'ESTIMATED PORT WAREHOUSE RECEIVE DATE',
-        'EST_PRN_RECEIVE_DATE_GROUPED': 'ESTIMATED PORT WAREHOUSE RECEIVE DATE (GROUPED)',
-        'OFFLOADING_TRUCK_ID': 'OFFLOADING / CURRENT REG ID',
-        'BAG_GROSS_WET_KG_INCL_SAMPLE_WMT': 'DRC DATA - GROSS WT INCL. SAMPLE (TONS)',
-        'BAG_GROSS_EXCL_SAMPLE_WMT': 'DRC DATA - GROSS WEIGHT EXCL. SAMPLE (TONS)',
-        'BAG_NET_EXCL_SAMPLE_WMT': 'DRC DATA - NET WEIGHT EXCL. SAMPLE (TONS)',
-        'BAG_GROSS_WET_KG_INCL_SAMPLE_KG': 'DRC DATA - GROSS WT INCL. SAMPLE (KG)',
-        'BAG_GROSS_EXCL_SAMPLE_KG': 'DRC DATA - GROSS WT EXCL. SAMPLE (KG)',
-        'DRC DATA - NET WT EXCL. SAMPLE (KG)': 'DRC DATA - NET WT EXCL. SAMPLE (KG)',
-        'MINE_LOADING_TS_BAG_MIRROR': 'DRC LOADED DATE',
-        'MINE_EXIT_TS_BAG_MIRROR': 'MINE EXIT DATE',
-        'BAG_EXPORT_TS': 'DRC EXPORT DATE',
-        'ROUTE_CONSIGNEE_1_BAG_MIRROR': 'TRANSIT WAREHOUSE',
-        'GRN_WH_GROSS_WEIGHT': 'ZM RECEIVING GW (KG)',
-        'GRN_WH_NET_WEIGHT': 'ZM RECEIVING NET (KG)',
-        'GRN_RECEIVED_DATE': 'ZM WHS RECEIVED DATE',
-        'GDN_LOADED_DATE': 'ZM WHS LOADED DATE',
-        'GDN_DISPATCH_DATE': 'ZM WHS DISPATCH DATE',
-        'PRN_ARRIVAL_DATE': 'PORT WHS ARRIVAL DATE',
-        'ROUTE_PORT_WAREHOUSE_BAG_MIRROR': 'INSTRUCTED PORT WHS',
-        'PRN_WAREHOUSE_NAME_SCOPE_2': 'RECEIVED - PORT WAREHOUSE',
-        'ROUTE_PORT_DESTINATION_BAG_MIRROR': 'INSTRUCTED PORT DESTINATION',
-        'ROUTE_FINAL_DESTINATION_BAG_MIRROR': 'INSTRUCTED FINAL DESTINATION',
-        'PRN_WH_GROSS_WEIGHT_SCOPE_2': 'PORT WHS GW (KG)',
-        'PRN_WH_NET_WEIGHT': 'PORT WHS NET WT (KG)',
-        'PRN_RECEIVED_DATE_SCOPE_2': 'PORT WHS RECEIVED DATE',
-        'PDN_LOADED_DATE': 'PORT WHS LOADED DATE',
-        'PDN_DISPATCH_DATE': 'PORT WHS DISPATCH DATE',
-        'EXPORT_TRUCK_ID_BAG_MIRROR': 'EXPORT TRUCK ID',
-        'SHUNT_TRUCK_ID_BAG_MIRROR': 'SHUNT TRUCK ID',
-        'DRC_WAGON_ID_BAG_MIRROR': 'WAGON ID',
-        'WG_TRAIN_NO_BAG_MIRROR': 'TRAIN NO',
-        'ZAM_TRUCK_ID_BAG_MIRROR': 'ZAMBIA TRUCK ID',
-        'BAG_SEAL_NO': 'DRC DATA - BAG SEAL NO',
-        'DMS_APPVL_PROC_STATUS_AUTO_BAG_MIRROR': 'IVANHOE INVOICE STATUS',
-        'FINAL_INCOTERM': 'FINAL INCOTERM',
-        'STOCK_COMMENTS': 'DIARY OF EVENTS YYYY-MM-DD - (User Initial)'
-    }
-    
     # Columns to exclude from production output (calculation-only columns)
     exclude_columns = [
         'BAG_FLAG_STATUS_DETAIL',
@@ -588,14 +862,50 @@ def create_excel_download(processed_df):
                 pass
     
     # Rename columns to production aliases
-    final_df = final_df.rename(columns=column_mapping)
+    final_df = final_df.rename(columns=PRODUCTION_COLUMN_ALIASES)
     
     output = BytesIO()
     with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
         final_df.to_excel(writer, index=False, sheet_name='Active_Bag_Report')
+        if tonnage_cube is not None:
+            tonnage_cube.rename(columns={**PRODUCTION_COLUMN_ALIASES, 'BAG_COUNT': 'BAG COUNT'}).to_excel(
+                writer, index=False, sheet_name='Tonnage_Summary')
     
     return output.getvalue()
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def run_report(df, report_date):
+    """Run the full pipeline once per upload and day, cached with the tonnage cube so drill-downs don't re-scan rows
+
+    report_date is only part of the cache key: overdue ETAs are grouped as "Investigate" against today's date.
+    """
+    processed_df = process_data(df)
+    comparison_df = create_comparison_df(df, processed_df)
+    tonnage_cube = build_tonnage_cube(processed_df)
+    excel_data = create_excel_download(processed_df, tonnage_cube)
+    return processed_df, comparison_df, tonnage_cube, excel_data
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_previous_template_snapshot(file_bytes):
+    """Process a previous template CSV and keep only its activity snapshot (None and a message if the template is invalid)"""
+    previous_df = pd.read_csv(BytesIO(file_bytes))
+    is_valid, message = validate_template(previous_df)
+    if not is_valid:
+        return None, message
+
+    # Keep the file's own ETA bucket: its "Investigate" check ran against the previous report's date
+    processed_df = process_data(previous_df).drop(columns=['EST_PRN_RECEIVE_DATE_GROUPED_CORRECTED'])
+    return create_activity_snapshot(processed_df), message
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_previous_report_snapshot(file_bytes):
+    """Read only the snapshot columns from a downloaded production workbook"""
+    report = pd.read_excel(
+        BytesIO(file_bytes), sheet_name='Active_Bag_Report',
+        usecols=[PRODUCTION_COLUMN_ALIASES[col] for col in SNAPSHOT_COLUMNS]
+    )
+    return create_activity_snapshot(report)
+
 # Streamlit App
 st.set_page_config(page_title="Active Bag Report Calculator", page_icon="📊", layout="wide")
 
@@ -625,8 +935,7 @@ if uploaded_file is not None:
             st.success("✅ Template validation passed!")
             
             with st.spinner("Processing data and calculating corrections..."):
-                processed_df = process_data(df)
-                comparison_df = create_comparison_df(df, processed_df)
+                processed_df, comparison_df, tonnage_cube, excel_data = run_report(df, datetime.now().date())
             
             # Summary statistics
             st.markdown("## 📈 Summary Statistics")
@@ -657,10 +966,113 @@ if uploaded_file is not None:
                         st.metric(col, count)
             else:
                 st.info("🎉 No corrections needed! All values are already correct.")
-            
+
+            # Tonnage roll-ups (served from the cached cube)
+            st.markdown("## 📦 Tonnage Roll-ups")
+            tonnage_col1, tonnage_col2, tonnage_col3 = st.columns(3)
+            with tonnage_col1:
+                st.metric("Bags", f"{int(tonnage_cube['BAG_COUNT'].sum()):,}")
+            with tonnage_col2:
+                st.metric("DRC Net Weight (Tons)", f"{tonnage_cube['BAG_NET_EXCL_SAMPLE_WMT'].sum():,.3f}")
+            with tonnage_col3:
+                st.metric("Port WHS Net Weight (KG)", f"{tonnage_cube['PRN_WH_NET_WEIGHT'].sum():,.1f}")
+
+            rollup_dimensions = st.multiselect("Group tonnage by", TONNAGE_CUBE_DIMENSIONS, default=['LIVE_CURRENT_ACTIVITY'])
+            with st.expander("Filter roll-up"):
+                rollup_filters = {
+                    dim: st.multiselect(dim, sorted(tonnage_cube[dim].unique()), key=f"rollup_filter_{dim}")
+                    for dim in TONNAGE_CUBE_DIMENSIONS
+                }
+            st.dataframe(rollup_tonnage_cube(tonnage_cube, rollup_dimensions, rollup_filters), height=400)
+
+            # What-if ETA scenarios
+            st.markdown("## 🔮 What-if ETA Scenarios")
+            with st.expander("Compare alternative transit-time tables (days to port)"):
+                st.number_input(
+                    "Number of alternative scenarios", min_value=1, max_value=50, value=1,
+                    key='eta_scenario_count', on_change=resize_eta_scenario_table
+                )
+                if 'eta_scenario_table' not in st.session_state:
+                    resize_eta_scenario_table()
+
+                eta_table = st.data_editor(
+                    st.session_state['eta_scenario_table'], key='eta_scenarios', disabled=['Baseline'],
+                    column_config={
+                        col: st.column_config.NumberColumn(min_value=0, required=True)
+                        for col in st.session_state['eta_scenario_table'].columns
+                    }
+                )
+                st.session_state['eta_scenario_edited'] = eta_table
+
+                scenarios = {name: eta_table[name].to_dict() for name in eta_table.columns}
+                try:
+                    scenario_est_dates, scenario_grouped = calculate_eta_scenarios(processed_df, scenarios)
+                except ValueError as e:
+                    st.error(f"❌ Invalid ETA scenario table: {str(e)}")
+                else:
+                    st.markdown("### Tonnage per Estimated Port Receive Bucket (BAG_NET_EXCL_SAMPLE_WMT)")
+                    st.dataframe(create_scenario_comparison(processed_df, scenario_grouped), height=400)
+
+                    st.markdown("### EST_PRN_RECEIVED_DATE per Scenario")
+                    scenario_est_dates = scenario_est_dates.set_index(processed_df['name'])
+                    st.dataframe(scenario_est_dates, height=300)
+                    st.download_button(
+                        label="📅 Download Scenario Estimated Dates (CSV)",
+                        data=scenario_est_dates.to_csv(date_format='%Y-%m-%d'),
+                        file_name="eta_scenario_est_prn_received_dates.csv",
+                        mime="text/csv"
+                    )
+
+            # Bag movement since the previous report
+            st.markdown("## 🔁 Bag Movement Since Previous Report")
+            current_snapshot = create_activity_snapshot(processed_df)
+            with st.expander("Compare with a previous upload or stored report"):
+                previous_file = st.file_uploader(
+                    "Previous Active Bag Report (template CSV or downloaded production Excel)", type=["csv", "xlsx"], key="previous_file"
+                )
+
+                previous_snapshot = None
+                if previous_file is not None:
+                    if previous_file.name.lower().endswith('.xlsx'):
+                        previous_snapshot = load_previous_report_snapshot(previous_file.getvalue())
+                    else:
+                        previous_snapshot, previous_message = load_previous_template_snapshot(previous_file.getvalue())
+                        if previous_snapshot is None:
+                            st.error(f"❌ Previous file template validation failed: {previous_message}")
+                elif 'stored_snapshot' in st.session_state:
+                    previous_snapshot = st.session_state['stored_snapshot']
+                    st.caption("Comparing with the stored report snapshot")
+
+                if st.button("Store this report as the previous snapshot"):
+                    st.session_state['stored_snapshot'] = current_snapshot
+                    st.success("✅ Snapshot stored for the next comparison")
+
+                if previous_snapshot is not None:
+                    movement = compare_snapshots(previous_snapshot, current_snapshot)
+
+                    movement_col1, movement_col2, movement_col3, movement_col4, movement_col5 = st.columns(5)
+                    with movement_col1:
+                        st.metric("Moved Bags", len(movement['moved']))
+                    with movement_col2:
+                        st.metric("New Bags", len(movement['new']))
+                    with movement_col3:
+                        st.metric("Departed Bags", len(movement['departed']))
+                    with movement_col4:
+                        st.metric("Stalled Bags", len(movement['stalled']))
+                    with movement_col5:
+                        st.metric("Newly Investigate", len(movement['newly_investigate']))
+
+                    st.markdown("### Activity Transitions (Previous → Current)")
+                    st.dataframe(movement['transitions'])
+
+                    movement_view = st.selectbox(
+                        "Show bags", ['moved', 'new', 'departed', 'stalled', 'newly_investigate'],
+                        format_func=lambda view: view.replace('_', ' ').title()
+                    )
+                    st.dataframe(movement[movement_view], height=300)
+
             # Download section
             st.markdown("## 📥 Download Corrected File")
-            excel_data = create_excel_download(processed_df)
             
             st.download_button(
                 label="📊 Download Production Report (Excel)",